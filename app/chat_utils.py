@@ -1,7 +1,7 @@
 class ChatMessageBuilder:
     @staticmethod
-    def append_image_to_last_user(messages, image_file, image_b64):
-        image_url = {"url": f"data:{image_file.content_type};base64,{image_b64}"}
+    def append_image_to_last_user(messages, content_type, image_b64):
+        image_url = {"url": f"data:{content_type};base64,{image_b64}"}
         if messages and messages[-1]["role"] == "user":
             # If last user message is plain text, convert to multimodal
             if isinstance(messages[-1]["content"], str):
@@ -21,6 +21,7 @@ class DocumentMeta(Base):
     filetype = Column(String)
     status = Column(String)
     extra = Column(Text)
+    collection = Column(String, index=True, default=None)  # vector collection; None means the default one
 
 class ChatSession(Base):
     __tablename__ = "chat_sessions"
@@ -40,9 +41,19 @@ class ChatHistory(Base):
 
 Base.metadata.create_all(bind=engine)
 
-def add_document_meta(filename, md5, filetype, status, extra=None):
+def _add_missing_columns():
+    # create_all does not alter existing tables, so add columns introduced after a database was created
+    with engine.begin() as conn:
+        columns = [row[1] for row in conn.exec_driver_sql("PRAGMA table_info(documents)")]
+        if "collection" not in columns:
+            conn.exec_driver_sql("ALTER TABLE documents ADD COLUMN collection VARCHAR")
+            conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_documents_collection ON documents (collection)")
+
+_add_missing_columns()
+
+def add_document_meta(filename, md5, filetype, status, extra=None, collection=None):
     db = SessionLocal()
-    doc = DocumentMeta(filename=filename, md5=md5, filetype=filetype, status=status, extra=extra or "")
+    doc = DocumentMeta(filename=filename, md5=md5, filetype=filetype, status=status, extra=extra or "", collection=collection)
     db.add(doc)
     db.commit()
     db.close()
@@ -75,6 +86,19 @@ def get_session_files(session_id: str):
     db.close()
     return [f.filename for f in files]
 
+def get_collection_files(collection: str):
+    db = SessionLocal()
+    files = db.query(DocumentMeta).filter(DocumentMeta.collection == collection).all()
+    db.close()
+    return [f.filename for f in files]
+
+def delete_collection_documents(collection: str) -> int:
+    db = SessionLocal()
+    count = db.query(DocumentMeta).filter(DocumentMeta.collection == collection).delete(synchronize_session=False)
+    db.commit()
+    db.close()
+    return count
+
 
 # Centralized chat history helpers
 def save_user_message(session_id: str, message: str):
@@ -99,6 +123,12 @@ def get_last_n_messages(session_id: str, limit: int = None):
     db.close()
     return list(reversed(msgs))
 
+def session_exists(session_id: str) -> bool:
+    db = SessionLocal()
+    exists = db.query(ChatSession).filter(ChatSession.id == session_id).first()
+    db.close()
+    return bool(exists)
+
 def get_session_or_create(session_id: str = None) -> str:
     db = SessionLocal()
     if session_id:
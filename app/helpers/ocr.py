@@ -1,7 +1,8 @@
 import easyocr
 from PIL import Image
 
-def ocr_image(file_path: str, lang: str = 'en') -> str:
+def ocr_image(image, lang: str = 'en') -> str:
+    # image may be a file path or the file's raw bytes
     reader = easyocr.Reader([lang], gpu=False)
-    result = reader.readtext(file_path, detail=0, paragraph=True)
+    result = reader.readtext(image, detail=0, paragraph=True)
     return "\n".join(result)
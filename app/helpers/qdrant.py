@@ -0,0 +1,114 @@
+import uuid
+from qdrant_client.http import models
+
+QDRANT_PATH = "uploaded_docs/qdrant_db"
+DEFAULT_COLLECTION = "docs"
+VECTOR_SIZE = 384
+SCROLL_BATCH_SIZE = 1000
+
+# Collections are addressed by logical name. After a compaction the logical name is an
+# alias for a physical collection "<name>.<suffix>"; '.' never appears in shard names.
+
+def iter_batches(client, collection_name: str, batch_size: int = SCROLL_BATCH_SIZE):
+    # Yields lists of points with their vectors and payloads, one scroll page at a time
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection_name,
+            limit=batch_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True,
+        )
+        if points:
+            yield points
+        if offset is None:
+            break
+
+def iter_points(client, collection_name: str, batch_size: int = SCROLL_BATCH_SIZE):
+    for points in iter_batches(client, collection_name, batch_size=batch_size):
+        yield from points
+
+def collection_aliases(client) -> dict:
+    return {a.alias_name: a.collection_name for a in client.get_aliases().aliases}
+
+def collection_names(client) -> list:
+    """Logical collection names: aliases plus physical collections no alias points to."""
+    aliases = collection_aliases(client)
+    targets = set(aliases.values())
+    physical = [c.name for c in client.get_collections().collections if c.name not in targets]
+    return physical + list(aliases)
+
+def vector_size(client, collection_name: str) -> int:
+    return client.get_collection(collection_name).config.params.vectors.size
+
+def create_collection(client, collection_name: str, size: int = VECTOR_SIZE):
+    client.create_collection(
+        collection_name=collection_name,
+        vectors_config=models.VectorParams(size=size, distance=models.Distance.COSINE),
+    )
+
+def remove_collection(client, collection_name: str):
+    """Delete a collection by logical name, including the physical collection behind an alias."""
+    target = collection_aliases(client).get(collection_name)
+    if target is None:
+        client.delete_collection(collection_name=collection_name)
+        return
+    client.update_collection_aliases(change_aliases_operations=[
+        models.DeleteAliasOperation(delete_alias=models.DeleteAlias(alias_name=collection_name)),
+    ])
+    client.delete_collection(collection_name=target)
+
+def recreate_collection(client, collection_name: str, size: int = VECTOR_SIZE):
+    """Drop collection_name if it exists and create it again, empty."""
+    if collection_name in collection_names(client):
+        remove_collection(client, collection_name)
+    create_collection(client, collection_name, size=size)
+
+def upload_points(client, collection_name: str, ids: list, vectors, payloads: list, batch_size: int = SCROLL_BATCH_SIZE):
+    if ids:
+        client.upload_collection(
+            collection_name=collection_name,
+            vectors=vectors,
+            payload=payloads,
+            ids=ids,
+            batch_size=batch_size,
+        )
+
+def rebuild_collection(client, collection_name: str, batch_size: int = SCROLL_BATCH_SIZE) -> int:
+    """Copy a collection's live points into a fresh physical collection and swap it in.
+
+    The source stays readable and intact until the copy has succeeded; afterwards the
+    logical name is pointed at the new collection and the old one is deleted. Returns
+    the number of points copied.
+    """
+    aliases = collection_aliases(client)
+    old_physical = aliases.get(collection_name, collection_name)
+    new_physical = f"{collection_name}.{uuid.uuid4().hex[:12]}"
+    create_collection(client, new_physical, size=vector_size(client, collection_name))
+    copied = 0
+    try:
+        for points in iter_batches(client, collection_name, batch_size=batch_size):
+            client.upsert(
+                collection_name=new_physical,
+                points=[models.PointStruct(id=p.id, vector=p.vector, payload=p.payload) for p in points],
+            )
+            copied += len(points)
+    except Exception:
+        client.delete_collection(collection_name=new_physical)
+        raise
+    if collection_name in aliases:
+        # Re-pointing an existing alias is a single atomic operation
+        client.update_collection_aliases(change_aliases_operations=[
+            models.DeleteAliasOperation(delete_alias=models.DeleteAlias(alias_name=collection_name)),
+            models.CreateAliasOperation(create_alias=models.CreateAlias(collection_name=new_physical, alias_name=collection_name)),
+        ])
+        client.delete_collection(collection_name=old_physical)
+    else:
+        # First compaction of a plain collection: the name must be freed before it can become
+        # an alias, so it is briefly missing, but the data is already safe in new_physical
+        client.delete_collection(collection_name=old_physical)
+        client.update_collection_aliases(change_aliases_operations=[
+            models.CreateAliasOperation(create_alias=models.CreateAlias(collection_name=new_physical, alias_name=collection_name)),
+        ])
+    return copied
@@ -1,17 +1,79 @@
 import base64
+import io
+import os
+import re
+from functools import lru_cache
 
 from fastapi import UploadFile, HTTPException
+from PIL import Image, ImageOps, UnidentifiedImageError
 from app.litellm_client import LiteLLMClient
 from app.chat_utils import ChatMessageBuilder
+from app.utils import get_file_md5
 
-# This assumes the LLM provider supports vision (e.g., GPT-4 Vision)
-def chat_with_image(image_file: UploadFile, messages: list, provider: str = "openai", llm: LiteLLMClient = None) -> str:
+IMAGE_DIR = os.path.join("uploaded_docs", "images")
+# Images are downscaled so their longest side fits IMAGE_MAX_SIDE before being sent to the vision model
+IMAGE_MAX_SIDE = int(os.getenv("IMAGE_MAX_SIDE", "1024"))
+IMAGE_JPEG_QUALITY = int(os.getenv("IMAGE_JPEG_QUALITY", "85"))
+IMAGE_CACHE_SIZE = int(os.getenv("IMAGE_CACHE_SIZE", "64"))
+_IMAGE_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+def _image_path(session_id: str, image_id: str) -> str:
+    if not _IMAGE_ID_RE.match(image_id or ""):
+        raise HTTPException(status_code=400, detail="Invalid image ID.")
+    return os.path.join(IMAGE_DIR, session_id, f"{image_id}.jpg")
+
+def store_image(session_id: str, image_file: UploadFile) -> str:
+    """Downscale and store an uploaded image for a session; returns its content-hash image ID."""
     if image_file.content_type not in ["image/png", "image/jpeg", "image/jpg"]:
         raise HTTPException(status_code=400, detail="Unsupported image type.")
     image_bytes = image_file.file.read()
-    image_b64 = base64.b64encode(image_bytes).decode("utf-8")
+    image_id = get_file_md5(image_bytes)
+    path = _image_path(session_id, image_id)
+    if os.path.exists(path):
+        # Same picture already stored for this session, nothing to re-encode
+        return image_id
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as img:
+            img = ImageOps.exif_transpose(img)
+            img.load()
+    except (UnidentifiedImageError, OSError, SyntaxError):
+        raise HTTPException(status_code=400, detail="Uploaded file is not a valid PNG or JPEG image.")
+    if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+        # JPEG has no alpha channel; flatten onto white so transparent areas don't turn black
+        img = img.convert("RGBA")
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        background.paste(img, mask=img.getchannel("A"))
+        img = background
+    img = img.convert("RGB")
+    img.thumbnail((IMAGE_MAX_SIDE, IMAGE_MAX_SIDE))
+    # Write to a temp file and rename, so a crash never leaves a partial JPEG under the final name
+    tmp_path = f"{path}.partial"
+    img.save(tmp_path, format="JPEG", quality=IMAGE_JPEG_QUALITY, optimize=True)
+    os.replace(tmp_path, path)
+    return image_id
+
+def image_exists(session_id: str, image_id: str) -> bool:
+    return os.path.exists(_image_path(session_id, image_id))
+
+@lru_cache(maxsize=IMAGE_CACHE_SIZE)
+def _load_image_b64(session_id: str, image_id: str) -> str:
+    with open(_image_path(session_id, image_id), "rb") as f:
+        return base64.b64encode(f.read()).decode("utf-8")
+
+def list_session_images(session_id: str) -> list:
+    session_dir = os.path.join(IMAGE_DIR, os.path.basename(session_id))
+    if not os.path.isdir(session_dir):
+        return []
+    return [os.path.splitext(name)[0] for name in os.listdir(session_dir) if name.endswith(".jpg")]
+
+# This assumes the LLM provider supports vision (e.g., GPT-4 Vision)
+def chat_with_image(session_id: str, image_id: str, messages: list, provider: str = "openai", llm: LiteLLMClient = None) -> str:
+    if not image_exists(session_id, image_id):
+        raise HTTPException(status_code=404, detail="Image not found for this session.")
+    image_b64 = _load_image_b64(session_id, image_id)
     # Use ChatMessageBuilder to append image to last user message
-    messages = ChatMessageBuilder.append_image_to_last_user(messages, image_file, image_b64)
+    messages = ChatMessageBuilder.append_image_to_last_user(messages, "image/jpeg", image_b64)
     if llm is None:
         from app.litellm_client import LiteLLMClient
         llm = LiteLLMClient(provider=provider)
@@ -1,5 +1,5 @@
 from app.chat_utils import ChatMessageBuilder
-from app.image_chat import chat_with_image
+from app.image_chat import chat_with_image, store_image, list_session_images, image_exists
 
 # Chat session and chat endpoints
 from app.db import (
@@ -10,7 +10,10 @@ from app.db import (
     get_session_or_create,
     get_all_sessions,
     get_session_files,
-    get_session_model
+    get_session_model,
+    get_collection_files,
+    delete_collection_documents,
+    session_exists
 )
 from fastapi import FastAPI, UploadFile, File, HTTPException, Form
 from fastapi.responses import JSONResponse
@@ -20,12 +23,12 @@ import os
 from app.utils import (
     validate_file,
     save_file,
-    extract_text_from_file,
     get_file_md5,
-    is_file_unique,
-    extract_metadata_from_file
+    is_file_unique
 )
+from app.rag_file_types.registry import parse_file
 from app.vectordb import vectordb
+from app.snapshot import export_snapshot, restore_snapshot, SNAPSHOT_DIR
 from app.db import add_document_meta, get_document_meta, SessionLocal, DocumentMeta
 
 from app.litellm_client import litellm_client
@@ -35,43 +38,65 @@ app = FastAPI()
 UPLOAD_DIR = "uploaded_docs"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+def resolve_collection(tenant: Optional[str] = None, session_id: Optional[str] = None) -> str:
+    try:
+        return vectordb.collection_for(tenant=tenant, session_id=session_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def resolve_shard(kind: str, name: str) -> str:
+    try:
+        return vectordb.shard_collection(kind, name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def document_collection(meta) -> str:
+    # Documents indexed before sharding have no collection recorded and live in the default one
+    return meta.collection or vectordb.collection_name
+
 @app.post(
     "/ingest",
     summary="Ingest a document",
-    description="Upload and ingest a document (PDF, DOCX, TXT, or image). If the file is an image, OCR is performed. Supports chunking and deduplication."
+    description="Upload and ingest a document (PDF, DOCX, TXT, Markdown, HTML, or image). If the file is an image, OCR is performed. Supports chunking and deduplication."
 )
 async def ingest_document(
-    file: UploadFile = File(..., description="Document file to upload (PDF, DOCX, TXT, or image)"),
+    file: UploadFile = File(..., description="Document file to upload (PDF, DOCX, TXT, Markdown, HTML, or image)"),
     chunk_size: int = 500,
     chunk_overlap: int = 50,
-    session_id: Optional[str] = Form(None, description="Session ID to associate this file with (optional)")
+    session_id: Optional[str] = Form(None, description="Session ID to associate this file with (optional)"),
+    tenant: Optional[str] = Form(None, description="Tenant whose collection the document is stored in (optional)")
 ):
     """Ingest a document with optional chunking parameters."""
     validate_file(file)
+    if session_id and not session_exists(session_id):
+        raise HTTPException(status_code=404, detail="Session not found.")
+    collection = resolve_collection(tenant=tenant, session_id=session_id)
     file_bytes = await file.read()
     file_md5 = get_file_md5(file_bytes)
     if not is_file_unique(file_md5, UPLOAD_DIR):
         raise HTTPException(status_code=400, detail="Duplicate file detected.")
+    # Stored files and metadata are keyed by filename across all tenants; refuse before overwriting anything
+    if get_document_meta(file.filename):
+        raise HTTPException(status_code=409, detail="A document with this filename already exists.")
     file_path = save_file(file, file_bytes, UPLOAD_DIR)
-    text = extract_text_from_file(file_path)
-    # Extract metadata for PDF/DOCX
-    metadata = extract_metadata_from_file(file_path)
+    # Parse once for both text and metadata; the handler is picked by magic bytes / MIME type
+    text, metadata = parse_file(file_path, file.content_type)
     # Chunk and embed using vectordb with custom params
     chunks = vectordb.chunk_text(text, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
     embeddings = vectordb.embed_chunks(chunks)
     doc_name = os.path.splitext(file.filename)[0]
     # Pass metadata for each chunk
     chunk_metadata = [metadata for _ in chunks]
-    vectordb.save_index(doc_name, embeddings, chunks, chunk_metadata=chunk_metadata)
+    vectordb.save_index(doc_name, embeddings, chunks, chunk_metadata=chunk_metadata, collection_name=collection)
     # Store metadata in SQLite (as JSON in extra)
     import json
     if session_id:
         metadata["session_id"] = session_id
-    add_document_meta(file.filename, file_md5, file.content_type, "indexed", extra=json.dumps(metadata))
+    add_document_meta(file.filename, file_md5, file.content_type, "indexed", extra=json.dumps(metadata), collection=collection)
     # Optionally save extracted text
     with open(f"{file_path}.txt", "w", encoding="utf-8") as f:
         f.write(text)
-    return {"filename": file.filename, "md5": file_md5, "chunks": len(chunks), "status": "ingested and indexed", "chunk_size": chunk_size, "chunk_overlap": chunk_overlap, "metadata": metadata}
+    return {"filename": file.filename, "md5": file_md5, "chunks": len(chunks), "status": "ingested and indexed", "chunk_size": chunk_size, "chunk_overlap": chunk_overlap, "collection": collection, "metadata": metadata}
 
 
 # Create a new chat session
@@ -151,7 +176,8 @@ async def ask_question(
     if not meta:
         return {"answer": "Document not found or not indexed."}
     doc_base = os.path.splitext(document_name)[0]
-    results = vectordb.search(doc_base, question, top_k=3)
+    # Only the shard holding this document is searched
+    results = vectordb.search(doc_base, question, top_k=3, collection_name=document_collection(meta))
     if not results:
         return {"answer": "No relevant content found."}
     history = get_last_n_messages(session_id)
@@ -209,8 +235,7 @@ def delete_file(filename: str):
             pass
     # Remove all vectors for this file from Qdrant
     doc_name = os.path.splitext(filename)[0]
-    # Qdrant API: delete by filter
-    vectordb.client.delete(collection_name=vectordb.collection_name, filter={"must": [{"key": "doc_name", "match": {"value": doc_name}}]})
+    vectordb.delete_document(doc_name, collection_name=document_collection(doc))
     # Remove metadata
     db.delete(doc)
     db.commit()
@@ -218,28 +243,135 @@ def delete_file(filename: str):
     return
 
 
+# Vector collection (shard) lifecycle
+@app.get(
+    "/collections",
+    summary="List vector collections",
+    description="List all vector collections (the shared default plus per-tenant/per-session shards)."
+)
+def list_collections():
+    return {"collections": vectordb.list_collections()}
+
+@app.post(
+    "/collections/{kind}/{name}",
+    summary="Create a shard collection",
+    description="Create the vector collection for a tenant or session (kind: tenant | session) ahead of its first upload."
+)
+def create_collection(kind: str, name: str):
+    collection = resolve_shard(kind, name)
+    if kind == "session" and not session_exists(name):
+        raise HTTPException(status_code=404, detail="Session not found.")
+    return {"collection": vectordb.create_collection(collection)}
+
+@app.post(
+    "/collections/{kind}/{name}/compact",
+    summary="Compact a shard collection",
+    description="Rebuild a tenant or session vector collection from its live points, discarding deleted ones."
+)
+def compact_collection(kind: str, name: str):
+    collection = resolve_shard(kind, name)
+    if not vectordb.has_collection(collection):
+        raise HTTPException(status_code=404, detail="Collection not found.")
+    return {"collection": collection, "points": vectordb.compact_collection(collection)}
+
+@app.delete(
+    "/collections/{kind}/{name}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Drop a shard collection",
+    description="Drop a tenant or session vector collection along with its documents' files and metadata."
+)
+def drop_collection(kind: str, name: str):
+    collection = resolve_shard(kind, name)
+    if not vectordb.has_collection(collection):
+        raise HTTPException(status_code=404, detail="Collection not found.")
+    for filename in get_collection_files(collection):
+        file_path = os.path.join(UPLOAD_DIR, filename)
+        for ext in ["", ".md5", ".txt"]:
+            try:
+                os.remove(file_path + ext)
+            except FileNotFoundError:
+                pass
+    vectordb.drop_collection(collection)
+    delete_collection_documents(collection)
+    return
+
+
+# Index snapshots for bootstrapping new replicas
+@app.post(
+    "/snapshot",
+    summary="Export index snapshot",
+    description="Write a consistent snapshot of all vector collections (float16 vectors + JSONL payloads) and the SQLite metadata."
+)
+def create_snapshot():
+    try:
+        out_dir = export_snapshot(vectordb.client)
+    except FileExistsError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"snapshot": os.path.basename(out_dir), "path": out_dir}
+
+@app.post(
+    "/snapshot/restore",
+    summary="Restore index snapshot",
+    description="Bulk-load a snapshot from the snapshots folder into the vector store and document metadata without re-embedding. The index must be empty unless replace is set."
+)
+def restore_index_snapshot(
+    snapshot: str = Form(..., description="Snapshot name as returned by POST /snapshot"),
+    replace: bool = Form(False, description="Overwrite a non-empty index; local collections missing from the snapshot are dropped")
+):
+    snapshot_dir = os.path.join(SNAPSHOT_DIR, os.path.basename(snapshot))
+    if not os.path.isdir(snapshot_dir):
+        raise HTTPException(status_code=404, detail="Snapshot not found.")
+    try:
+        manifest = restore_snapshot(vectordb.client, snapshot_dir, replace=replace)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=f"Incomplete snapshot: {e}")
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    finally:
+        vectordb.refresh_collections()
+    return {"snapshot": snapshot, "collections": manifest["collections"]}
+
+@app.get(
+    "/chat/session/{session_id}/images",
+    summary="List images for a session",
+    description="List the IDs of images stored in a chat session, usable as image_id in /chat/image."
+)
+def list_session_image_ids(session_id: str):
+    return {"images": list_session_images(session_id)}
+
 @app.post(
     "/chat/image",
     summary="Chat with an image",
-    description="Upload an image and ask a question about it. Uses a multimodal LLM (e.g., GPT-4 Vision) to analyze the image and answer."
+    description="Upload an image (or reference one already stored in the session by image_id) and ask a question about it. Uses a multimodal LLM (e.g., GPT-4 Vision) to analyze the image and answer."
 )
 async def chat_image(
-    image: UploadFile = File(..., description="Image file (PNG, JPG, JPEG)"),
+    image: Optional[UploadFile] = File(None, description="Image file (PNG, JPG, JPEG); omit to reuse a stored image via image_id"),
     question: str = Form(..., description="Question to ask about the image"),
     provider: str = Form("openai", description="LLM provider (e.g., openai, gemini)"),
-    session_id: Optional[str] = Form(None, description="Session ID for chat history (optional)")
+    session_id: Optional[str] = Form(None, description="Session ID for chat history (optional)"),
+    image_id: Optional[str] = Form(None, description="ID of an image previously uploaded in this session (optional)")
 ):
+    if image is None:
+        if not image_id:
+            raise HTTPException(status_code=400, detail="Either an image or an image_id is required.")
+        # A stored image only exists inside an existing session; check before creating sessions or saving messages
+        if not session_id or not session_exists(session_id) or not image_exists(session_id, image_id):
+            raise HTTPException(status_code=404, detail="Image not found for this session.")
     try:
         session_id = get_session_or_create(session_id)
+        if image is not None:
+            image_id = store_image(session_id, image)
         save_user_message(session_id, question)
         history = get_last_n_messages(session_id)
         model_name = get_session_model(session_id)
         from app.litellm_client import LiteLLMClient
         llm = LiteLLMClient(model=model_name) if model_name else litellm_client
         messages = ChatMessageBuilder.build_messages(history, user_message=question)
-        answer = chat_with_image(image, messages=messages, provider=provider, llm=llm)
+        answer = chat_with_image(session_id, image_id, messages=messages, provider=provider, llm=llm)
         save_assistant_message(session_id, answer)
-        return {"answer": answer, "session_id": session_id, "history": [{"role": m.role, "message": m.message} for m in history]}
+        return {"answer": answer, "image_id": image_id, "session_id": session_id, "history": [{"role": m.role, "message": m.message} for m in history]}
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Image chat error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
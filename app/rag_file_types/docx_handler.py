@@ -1,10 +1,8 @@
-import os
 from docx import Document
 
-def extract_metadata(file_path: str) -> dict:
+def _metadata_from_document(doc) -> dict:
     metadata = {"author": None, "title": None, "creation_date": None}
     try:
-        doc = Document(file_path)
         core = doc.core_properties
         metadata["author"] = core.author
         metadata["title"] = core.title
@@ -13,5 +11,7 @@ def extract_metadata(file_path: str) -> dict:
         pass
     return metadata
 
-def is_docx(file_path: str) -> bool:
-    return os.path.splitext(file_path)[1].lower() == ".docx"
+def parse(file_path: str) -> tuple:
+    doc = Document(file_path)
+    text = "\n".join([p.text for p in doc.paragraphs])
+    return text, _metadata_from_document(doc)
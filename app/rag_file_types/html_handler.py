@@ -0,0 +1,41 @@
+import os
+from html.parser import HTMLParser
+
+class _TextExtractor(HTMLParser):
+    SKIP_TAGS = {"script", "style"}
+
+    def __init__(self):
+        super().__init__()
+        self.parts = []
+        self.title = None
+        self._skip = 0
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "title":
+            self._in_title = True
+        if tag in self.SKIP_TAGS:
+            self._skip += 1
+
+    def handle_endtag(self, tag):
+        if tag == "title":
+            self._in_title = False
+        if tag in self.SKIP_TAGS and self._skip:
+            self._skip -= 1
+
+    def handle_data(self, data):
+        if self._in_title and self.title is None and data.strip():
+            self.title = data.strip()
+        if not self._skip and data.strip():
+            self.parts.append(data.strip())
+
+def parse(file_path: str) -> tuple:
+    with open(file_path, "r", encoding="utf-8", errors="replace") as f:
+        extractor = _TextExtractor()
+        extractor.feed(f.read())
+    metadata = {"author": None, "title": extractor.title or os.path.basename(file_path), "creation_date": None}
+    try:
+        metadata["creation_date"] = str(os.stat(file_path).st_ctime)
+    except Exception:
+        pass
+    return "\n".join(extractor.parts), metadata
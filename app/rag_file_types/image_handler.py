@@ -1,17 +1,24 @@
+import io
 import os
 from PIL import Image
+from app.helpers.ocr import ocr_image
 
-def extract_metadata(file_path: str) -> dict:
+def _metadata_from_image(file_path: str, img) -> dict:
     metadata = {"author": None, "title": os.path.basename(file_path), "creation_date": None, "format": None, "size": None}
     try:
         stat = os.stat(file_path)
         metadata["creation_date"] = str(stat.st_ctime)
-        with Image.open(file_path) as img:
-            metadata["format"] = img.format
-            metadata["size"] = img.size
+        metadata["format"] = img.format
+        metadata["size"] = img.size
     except Exception:
         pass
     return metadata
 
-def is_image(file_path: str) -> bool:
-    return os.path.splitext(file_path)[1].lower() in [".png", ".jpg", ".jpeg"]
+def parse(file_path: str) -> tuple:
+    # Read the file once: PIL only needs the header for metadata, and easyocr decodes the
+    # same bytes exactly as it would the path (RGB for detection, greyscale for recognition)
+    with open(file_path, "rb") as f:
+        image_bytes = f.read()
+    with Image.open(io.BytesIO(image_bytes)) as img:
+        metadata = _metadata_from_image(file_path, img)
+    return ocr_image(image_bytes), metadata
@@ -1,10 +1,8 @@
-import os
 from PyPDF2 import PdfReader
 
-def extract_metadata(file_path: str) -> dict:
+def _metadata_from_reader(reader) -> dict:
     metadata = {"author": None, "title": None, "creation_date": None}
     try:
-        reader = PdfReader(file_path)
         doc_info = reader.metadata or reader.getDocumentInfo() if hasattr(reader, 'getDocumentInfo') else None
         if doc_info:
             metadata["author"] = getattr(doc_info, 'author', None) or doc_info.get('/Author')
@@ -19,5 +17,8 @@ def extract_metadata(file_path: str) -> dict:
         pass
     return metadata
 
-def is_pdf(file_path: str) -> bool:
-    return os.path.splitext(file_path)[1].lower() == ".pdf"
+def parse(file_path: str) -> tuple:
+    # Single PdfReader for both the page text and the document info
+    reader = PdfReader(file_path)
+    text = "\n".join(page.extract_text() or "" for page in reader.pages)
+    return text, _metadata_from_reader(reader)
@@ -0,0 +1,89 @@
+import os
+from fastapi import HTTPException
+from app.rag_file_types import pdf_handler, docx_handler, txt_handler, html_handler, image_handler
+
+# Number of leading bytes read from a file to sniff its type
+MAGIC_HEADER_SIZE = 16
+
+
+class FileHandler:
+    """A parser that returns (text, metadata) for a file from a single parse."""
+
+    def __init__(self, name: str, parse, mime_types: list, magic: list = None, extensions: list = None):
+        self.name = name
+        self.parse = parse
+        self.mime_types = mime_types
+        self.magic = magic or []
+        self.extensions = extensions or []
+
+
+_handlers = []
+
+
+def register_handler(handler: FileHandler, first: bool = False):
+    """Register a handler. Use first=True for fast-path handlers that should win over the built-ins."""
+    if first:
+        _handlers.insert(0, handler)
+    else:
+        _handlers.append(handler)
+    return handler
+
+
+def supported_mime_types() -> list:
+    return [mime for h in _handlers for mime in h.mime_types]
+
+
+def is_supported(content_type: str = None, filename: str = None) -> bool:
+    # Browsers often send generic types (application/octet-stream, text/x-markdown), so accept a known extension too
+    if content_type in supported_mime_types():
+        return True
+    ext = os.path.splitext(filename or "")[1].lower()
+    return any(ext in h.extensions for h in _handlers)
+
+
+def _read_header(file_path: str) -> bytes:
+    try:
+        with open(file_path, "rb") as f:
+            return f.read(MAGIC_HEADER_SIZE)
+    except OSError:
+        return b""
+
+
+def resolve_handler(file_path: str, content_type: str = None) -> FileHandler:
+    header = _read_header(file_path)
+    by_magic = [h for h in _handlers if any(header.startswith(m) for m in h.magic)]
+    # Container formats (e.g. zip for DOCX) share magic bytes, so prefer the one matching the declared type
+    for h in by_magic:
+        if content_type in h.mime_types:
+            return h
+    if by_magic:
+        return by_magic[0]
+    # Text formats have no magic bytes; trust the declared type, then fall back to the extension
+    for h in _handlers:
+        if not h.magic and content_type in h.mime_types:
+            return h
+    ext = os.path.splitext(file_path)[1].lower()
+    for h in _handlers:
+        if not h.magic and ext in h.extensions:
+            return h
+    raise HTTPException(status_code=400, detail="Unsupported file type for text extraction.")
+
+
+def parse_file(file_path: str, content_type: str = None) -> tuple:
+    """Parse a file once and return (text, metadata)."""
+    handler = resolve_handler(file_path, content_type)
+    return handler.parse(file_path)
+
+
+register_handler(FileHandler("pdf", pdf_handler.parse, ["application/pdf"], magic=[b"%PDF-"], extensions=[".pdf"]))
+register_handler(FileHandler(
+    "docx",
+    docx_handler.parse,
+    ["application/vnd.openxmlformats-officedocument.wordprocessingml.document"],
+    magic=[b"PK\x03\x04"],
+    extensions=[".docx"],
+))
+register_handler(FileHandler("png", image_handler.parse, ["image/png"], magic=[b"\x89PNG\r\n\x1a\n"], extensions=[".png"]))
+register_handler(FileHandler("jpeg", image_handler.parse, ["image/jpeg", "image/jpg"], magic=[b"\xff\xd8\xff"], extensions=[".jpg", ".jpeg"]))
+register_handler(FileHandler("html", html_handler.parse, ["text/html"], extensions=[".html", ".htm"]))
+register_handler(FileHandler("text", txt_handler.parse, ["text/plain", "text/markdown", "text/x-markdown"], extensions=[".txt", ".md"]))
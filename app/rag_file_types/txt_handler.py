@@ -9,5 +9,8 @@ def extract_metadata(file_path: str) -> dict:
         pass
     return metadata
 
-def is_txt(file_path: str) -> bool:
-    return os.path.splitext(file_path)[1].lower() == ".txt"
+def parse(file_path: str) -> tuple:
+    # Plain text and Markdown are indexed as-is
+    with open(file_path, "r", encoding="utf-8") as f:
+        text = f.read()
+    return text, extract_metadata(file_path)
@@ -0,0 +1,240 @@
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+from datetime import datetime
+
+import numpy as np
+
+from app.db import DB_PATH
+from app.helpers.qdrant import QDRANT_PATH, DEFAULT_COLLECTION, collection_names, iter_batches, vector_size, recreate_collection, remove_collection, upload_points
+
+SNAPSHOT_DIR = os.path.join("uploaded_docs", "snapshots")
+SNAPSHOT_BATCH_SIZE = 1000
+MANIFEST_FILE = "manifest.json"
+METADATA_FILE = "metadata.db"
+# Only document metadata is restored; chat sessions and history stay local to each node
+METADATA_TABLE = "documents"
+
+# Snapshot layout:
+#   manifest.json               collections, point counts and vector sizes
+#   metadata.db                 online copy of the SQLite metadata database
+#   <collection>.vectors.npy    float16 array, one row per point
+#   <collection>.payload.jsonl  one {"id", "payload"} object per point, same order as the vectors
+
+
+def _backup_sqlite(src_path: str, dest_path: str):
+    # sqlite3's backup API gives a consistent copy even while the app is writing
+    src = sqlite3.connect(src_path)
+    dest = sqlite3.connect(dest_path)
+    try:
+        src.backup(dest)
+    finally:
+        dest.close()
+        src.close()
+
+
+def _resize_vectors(path: str, rows: int):
+    # Copy into a file of the new length in batches, so the array is never fully in memory
+    old = np.load(path, mmap_mode="r")
+    tmp_path = f"{path}.resize"
+    new = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float16, shape=(rows, old.shape[1]))
+    for start in range(0, min(rows, old.shape[0]), SNAPSHOT_BATCH_SIZE):
+        end = min(start + SNAPSHOT_BATCH_SIZE, rows, old.shape[0])
+        new[start:end] = old[start:end]
+    new.flush()
+    del new, old
+    os.replace(tmp_path, path)
+
+
+def _export_collection(client, collection_name: str, out_dir: str, doc_names: set) -> dict:
+    """Stream a collection to disk one scroll batch at a time; records each point's doc_name in doc_names."""
+    size = vector_size(client, collection_name)
+    capacity = client.count(collection_name=collection_name, exact=True).count
+    vectors_path = os.path.join(out_dir, f"{collection_name}.vectors.npy")
+    vectors = np.lib.format.open_memmap(vectors_path, mode="w+", dtype=np.float16, shape=(capacity, size))
+    written = 0
+    with open(os.path.join(out_dir, f"{collection_name}.payload.jsonl"), "w", encoding="utf-8") as f:
+        for points in iter_batches(client, collection_name, batch_size=SNAPSHOT_BATCH_SIZE):
+            if written + len(points) > capacity:
+                # Points were added since the count; grow the file rather than dropping them
+                vectors.flush()
+                del vectors
+                capacity = max(capacity * 2, written + len(points))
+                _resize_vectors(vectors_path, capacity)
+                vectors = np.lib.format.open_memmap(vectors_path, mode="r+")
+            vectors[written:written + len(points)] = np.asarray([p.vector for p in points], dtype=np.float16)
+            written += len(points)
+            for p in points:
+                f.write(json.dumps({"id": p.id, "payload": p.payload}) + "\n")
+                doc_name = ((p.payload or {}).get("metadata") or {}).get("doc_name")
+                if doc_name is not None:
+                    doc_names.add(doc_name)
+    vectors.flush()
+    del vectors
+    if written != capacity:
+        _resize_vectors(vectors_path, written)
+    return {"points": written, "size": size}
+
+
+def _drop_documents_without_vectors(snapshot_db: str, present: dict):
+    # A file deleted during the export loses its vectors before its metadata row, so the
+    # copied table can still list it; keep only rows whose vectors made it into the snapshot
+    conn = sqlite3.connect(snapshot_db)
+    try:
+        rows = conn.execute(f"SELECT id, filename, collection FROM {METADATA_TABLE}").fetchall()
+        stale = [
+            (row_id,) for row_id, filename, collection in rows
+            if os.path.splitext(filename)[0] not in present.get(collection or DEFAULT_COLLECTION, set())
+        ]
+        with conn:
+            conn.executemany(f"DELETE FROM {METADATA_TABLE} WHERE id = ?", stale)
+    finally:
+        conn.close()
+
+
+def export_snapshot(client, out_dir: str = None) -> str:
+    """Write a snapshot of every vector collection and the SQLite metadata; returns the snapshot directory."""
+    if out_dir is None:
+        out_dir = os.path.join(SNAPSHOT_DIR, f"snapshot-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}")
+    if os.path.exists(out_dir):
+        raise FileExistsError(f"Snapshot directory already exists: {out_dir}")
+    tmp_dir = f"{out_dir}.partial"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    try:
+        # Metadata first: ingestion writes vectors before metadata, so every document
+        # ingested before the copy already has its vectors in the store when they are read below
+        snapshot_db = os.path.join(tmp_dir, METADATA_FILE)
+        _backup_sqlite(DB_PATH, snapshot_db)
+        collections, present = {}, {}
+        for name in collection_names(client):
+            present[name] = set()
+            collections[name] = _export_collection(client, name, tmp_dir, present[name])
+        _drop_documents_without_vectors(snapshot_db, present)
+        manifest = {
+            "created_at": datetime.utcnow().isoformat(),
+            "vector_dtype": "float16",
+            "collections": collections,
+        }
+        with open(os.path.join(tmp_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    # Only a fully written snapshot ever appears under its final name
+    os.rename(tmp_dir, out_dir)
+    return out_dir
+
+
+def _check_collection(snapshot_dir: str, collection_name: str, info: dict):
+    # Validate by shape and line count without reading the data into memory
+    vectors = np.load(os.path.join(snapshot_dir, f"{collection_name}.vectors.npy"), mmap_mode="r")
+    with open(os.path.join(snapshot_dir, f"{collection_name}.payload.jsonl"), "r", encoding="utf-8") as f:
+        lines = sum(1 for _ in f)
+    if vectors.shape != (info["points"], info["size"]) or lines != info["points"]:
+        raise ValueError(f"Snapshot for '{collection_name}' is inconsistent: vectors {vectors.shape}, {lines} payloads, {info['points']} points of size {info['size']} in manifest.")
+
+
+def _restore_collection(client, snapshot_dir: str, collection_name: str, info: dict):
+    recreate_collection(client, collection_name, size=info["size"])
+    vectors = np.load(os.path.join(snapshot_dir, f"{collection_name}.vectors.npy"), mmap_mode="r")
+    ids, payloads = [], []
+    start = 0
+    with open(os.path.join(snapshot_dir, f"{collection_name}.payload.jsonl"), "r", encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            ids.append(record["id"])
+            payloads.append(record["payload"])
+            if len(ids) == SNAPSHOT_BATCH_SIZE:
+                # Bulk upload of stored vectors, one batch at a time: no re-embedding
+                upload_points(client, collection_name, ids, vectors[start:start + len(ids)].astype(np.float32), payloads, batch_size=SNAPSHOT_BATCH_SIZE)
+                start += len(ids)
+                ids, payloads = [], []
+    upload_points(client, collection_name, ids, vectors[start:start + len(ids)].astype(np.float32), payloads, batch_size=SNAPSHOT_BATCH_SIZE)
+
+
+def _document_count(db_path: str) -> int:
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM {METADATA_TABLE}").fetchone()[0]
+    except sqlite3.OperationalError:
+        return 0
+    finally:
+        conn.close()
+
+
+def _restore_documents(snapshot_db: str, db_path: str):
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("ATTACH DATABASE ? AS snap", (snapshot_db,))
+        live = [row[1] for row in conn.execute(f"PRAGMA main.table_info({METADATA_TABLE})")]
+        snap = [row[1] for row in conn.execute(f"PRAGMA snap.table_info({METADATA_TABLE})")]
+        # Snapshots from an older schema may lack newer columns; copy the ones both sides have
+        columns = ", ".join(c for c in live if c in snap)
+        with conn:
+            conn.execute(f"DELETE FROM main.{METADATA_TABLE}")
+            conn.execute(f"INSERT INTO main.{METADATA_TABLE} ({columns}) SELECT {columns} FROM snap.{METADATA_TABLE}")
+        conn.execute("DETACH DATABASE snap")
+    finally:
+        conn.close()
+
+
+def restore_snapshot(client, snapshot_dir: str, replace: bool = False) -> dict:
+    """Load a snapshot written by export_snapshot into the vector store and document metadata.
+
+    Without replace the target must be fresh: no collection may hold points and no
+    documents may be recorded. With replace the index is made to match the snapshot,
+    so local collections that are not in it are dropped. Chat sessions are never touched.
+    """
+    with open(os.path.join(snapshot_dir, MANIFEST_FILE), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    snapshot_db = os.path.join(snapshot_dir, METADATA_FILE)
+    if not os.path.exists(snapshot_db):
+        raise FileNotFoundError(f"Snapshot metadata not found: {snapshot_db}")
+
+    # Validate everything before changing anything, so a refused restore leaves the node untouched
+    local = collection_names(client)
+    if not replace:
+        non_empty = [name for name in local if client.count(collection_name=name).count]
+        if non_empty:
+            raise ValueError(f"Collections already contain points: {', '.join(non_empty)}; restore with replace=True to overwrite them.")
+        if _document_count(DB_PATH):
+            raise ValueError("Document metadata is not empty; restore with replace=True to overwrite it.")
+    for name, info in manifest["collections"].items():
+        _check_collection(snapshot_dir, name, info)
+
+    if replace:
+        for name in local:
+            if name not in manifest["collections"]:
+                remove_collection(client, name)
+    for name, info in manifest["collections"].items():
+        _restore_collection(client, snapshot_dir, name, info)
+    _restore_documents(snapshot_db, DB_PATH)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export or restore an index snapshot (vectors + document metadata). Stop the server first; use POST /snapshot on a running node.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export_cmd = sub.add_parser("export", help="Write a snapshot of the current index")
+    export_cmd.add_argument("out_dir", nargs="?", default=None, help="Snapshot directory (default: uploaded_docs/snapshots/snapshot-<timestamp>)")
+    restore_cmd = sub.add_parser("restore", help="Bulk-load a snapshot into the local index")
+    restore_cmd.add_argument("snapshot_dir", help="Snapshot directory written by 'export'")
+    restore_cmd.add_argument("--replace", action="store_true", help="Overwrite a non-empty index instead of requiring a fresh one")
+    args = parser.parse_args()
+
+    # A bare client: no embedding model is needed. Local mode locks the folder, so the server must be stopped.
+    from qdrant_client import QdrantClient
+    client = QdrantClient(path=QDRANT_PATH, prefer_grpc=False)
+    if args.command == "export":
+        print(export_snapshot(client, args.out_dir))
+    else:
+        manifest = restore_snapshot(client, args.snapshot_dir, replace=args.replace)
+        for name, info in manifest["collections"].items():
+            print(f"{name}: {info['points']} points")
+
+
+if __name__ == "__main__":
+    main()
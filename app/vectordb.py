@@ -1,18 +1,94 @@
+import os
+import re
+import threading
 from qdrant_client import QdrantClient
+from qdrant_client.http import models
 from langchain_qdrant import Qdrant as LangchainQdrant
 from langchain_huggingface import HuggingFaceEmbeddings
+from app.helpers.qdrant import QDRANT_PATH, DEFAULT_COLLECTION, VECTOR_SIZE, collection_names, recreate_collection, rebuild_collection, remove_collection
 
-QDRANT_PATH = "uploaded_docs/qdrant_db"
+SHARD_KINDS = ("tenant", "session")
+# When set, documents uploaded with a session_id (and no tenant) get their own per-session collection
+SHARD_BY_SESSION = os.getenv("QDRANT_SHARD_BY_SESSION", "0") == "1"
+_SHARD_NAME_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
 
 class QdrantVectorDB:
-    def __init__(self, path=QDRANT_PATH, collection_name="docs"):
+    def __init__(self, path=QDRANT_PATH, collection_name=DEFAULT_COLLECTION):
         self.client = QdrantClient(path=path, prefer_grpc=False)
         self.collection_name = collection_name
         self.embedder = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-        # Create collection if not exists
-        if collection_name not in [c.name for c in self.client.get_collections().collections]:
-            self.client.create_collection(collection_name=collection_name, vectors_config={"size": 384, "distance": "Cosine"})
-        self.lc_qdrant = LangchainQdrant(self.client, collection_name, self.embedder)
+        # One LangChain wrapper per collection, created lazily
+        self._stores = {}
+        # Per-collection locks: writes wait while a compaction rebuilds the collection
+        self._write_locks = {}
+        self.create_collection(collection_name)
+        self.lc_qdrant = self._store(collection_name)
+
+    # Shard routing and lifecycle
+    def shard_collection(self, kind, name):
+        """Return the collection name of a per-tenant or per-session shard."""
+        if kind not in SHARD_KINDS:
+            raise ValueError(f"Shard kind must be one of: {', '.join(SHARD_KINDS)}.")
+        if not _SHARD_NAME_RE.match(name or ""):
+            raise ValueError("Tenant/session names may only contain letters, digits, '_' and '-'.")
+        return f"{self.collection_name}_{kind}_{name}"
+
+    def collection_for(self, tenant=None, session_id=None):
+        """Return the collection a document belongs to: per-tenant, per-session, or the shared default."""
+        if tenant:
+            return self.shard_collection("tenant", tenant)
+        if session_id and SHARD_BY_SESSION:
+            return self.shard_collection("session", session_id)
+        return self.collection_name
+
+    def list_collections(self):
+        return collection_names(self.client)
+
+    def has_collection(self, collection_name):
+        return collection_name in self.list_collections()
+
+    def create_collection(self, collection_name):
+        if not self.has_collection(collection_name):
+            self.client.create_collection(collection_name=collection_name, vectors_config={"size": VECTOR_SIZE, "distance": "Cosine"})
+        return collection_name
+
+    def reset_collection(self, collection_name, size=VECTOR_SIZE):
+        """Drop and recreate a collection, empty."""
+        self._stores.pop(collection_name, None)
+        recreate_collection(self.client, collection_name, size=size)
+
+    def compact_collection(self, collection_name):
+        """Rebuild a collection from its live points; returns the number of points kept.
+
+        Local mode has no optimizer to vacuum deleted points, so the points are copied in
+        batches into a new collection that replaces the old one once the copy succeeds.
+        This works the same against a server. Searches keep using the old collection
+        until the swap; writes to it wait for the rebuild to finish.
+        """
+        with self._write_lock(collection_name):
+            return rebuild_collection(self.client, collection_name)
+
+    def _write_lock(self, collection_name):
+        return self._write_locks.setdefault(collection_name, threading.Lock())
+
+    def refresh_collections(self):
+        """Forget cached per-collection wrappers after collections were changed outside this object (e.g. a snapshot restore)."""
+        self._stores = {}
+        self.create_collection(self.collection_name)
+        self.lc_qdrant = self._store(self.collection_name)
+
+    def drop_collection(self, collection_name):
+        if collection_name == self.collection_name:
+            raise ValueError("The default collection cannot be dropped.")
+        self._stores.pop(collection_name, None)
+        with self._write_lock(collection_name):
+            remove_collection(self.client, collection_name)
+
+    def _store(self, collection_name):
+        if collection_name not in self._stores:
+            self.create_collection(collection_name)
+            self._stores[collection_name] = LangchainQdrant(self.client, collection_name, self.embedder)
+        return self._stores[collection_name]
 
     def chunk_text(self, text, chunk_size=500, chunk_overlap=50):
         from langchain.text_splitter import RecursiveCharacterTextSplitter
@@ -22,7 +98,7 @@ class QdrantVectorDB:
     def embed_chunks(self, chunks):
         return self.embedder.embed_documents(chunks)
 
-    def save_index(self, doc_name, embeddings, chunks, chunk_metadata=None):
+    def save_index(self, doc_name, embeddings, chunks, chunk_metadata=None, collection_name=None):
         # chunk_metadata: list of dicts, one per chunk, or None
         metadatas = []
         if chunk_metadata and len(chunk_metadata) == len(chunks):
@@ -32,11 +108,31 @@ class QdrantVectorDB:
                 metadatas.append(m)
         else:
             metadatas = [{"doc_name": doc_name} for _ in chunks]
-        self.lc_qdrant.add_texts(texts=chunks, metadatas=metadatas)
+        collection_name = collection_name or self.collection_name
+        with self._write_lock(collection_name):
+            self._store(collection_name).add_texts(texts=chunks, metadatas=metadatas)
 
-    def search(self, doc_name, query, top_k=3):
-        retriever = self.lc_qdrant.as_retriever(search_kwargs={"k": top_k, "filter": {"doc_name": doc_name}})
+    def search(self, doc_name, query, top_k=3, collection_name=None):
+        collection_name = collection_name or self.collection_name
+        # Reads never create shards: a dropped collection simply has no results
+        if not self.has_collection(collection_name):
+            return []
+        store = self._store(collection_name)
+        retriever = store.as_retriever(search_kwargs={"k": top_k, "filter": {"doc_name": doc_name}})
         docs = retriever.get_relevant_documents(query)
         return [d.page_content for d in docs] if docs else []
 
-vectordb = QdrantVectorDB()
\ No newline at end of file
+    def delete_document(self, doc_name, collection_name=None):
+        collection_name = collection_name or self.collection_name
+        if not self.has_collection(collection_name):
+            return
+        # LangChain stores chunk metadata under the "metadata" payload key
+        with self._write_lock(collection_name):
+            self.client.delete(
+                collection_name=collection_name,
+                points_selector=models.FilterSelector(
+                    filter=models.Filter(must=[models.FieldCondition(key="metadata.doc_name", match=models.MatchValue(value=doc_name))])
+                ),
+            )
+
+vectordb = QdrantVectorDB()